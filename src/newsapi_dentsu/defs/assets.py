@@ -1,27 +1,37 @@
 import pandas as pd
+import pyarrow as pa
+from pandas.api.types import is_datetime64_any_dtype
 import dagster as dg
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Tuple
 
 from eventregistry import EventRegistry, QueryArticlesIter, QueryItems
 
+from newsapi_dentsu.defs.resources import use_postgres
 
-api_key = dg.EnvVar("NEWSAPI_KEY").get_value()
-er = EventRegistry(apiKey=api_key)
+
+@lru_cache(maxsize=None)
+def get_eventregistry_client() -> EventRegistry:
+    """Get the shared EventRegistry client, creating it on first use"""
+    # The client holds a single requests.Session, so reusing it across
+    # materializations keeps the HTTP connection to the API alive
+    api_key = dg.EnvVar("NEWSAPI_KEY").get_value()
+    return EventRegistry(apiKey=api_key)
 
 
 def get_last_fetch_timestamp(
-    context: dg.AssetExecutionContext, asset_key: str
+    context: dg.AssetExecutionContext,
+    asset_key: str,
+    now: Optional[datetime] = None,
 ) -> Optional[str]:
     """Get the last fetch timestamp from the previous materialization"""
     # Parse asset_key string into list for AssetKey constructor
     # e.g., "raw/ai_marketing_news_raw" -> ["raw", "ai_marketing_news_raw"]
-    asset_key_parts = asset_key.split("/")
-    last_run = context.instance.get_latest_materialization_event(
-        dg.AssetKey(asset_key_parts)
-    )
+    key = dg.AssetKey(asset_key.split("/"))
+    # Batched lookup: one storage query however many keys are requested
+    last_run = context.instance.get_latest_materialization_events([key]).get(key)
 
-    context.log.info(f"Last run event: {last_run}")
     if last_run and last_run.asset_materialization:
         metadata = last_run.asset_materialization.metadata
         if "last_fetch_timestamp" in metadata:
@@ -39,7 +49,159 @@ def get_last_fetch_timestamp(
                 return datetime.fromtimestamp(ts_value).strftime("%Y-%m-%d")
 
     # Default: fetch from 7 days ago if no previous run
-    return (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+    now = now or datetime.now()
+    return (now - timedelta(days=7)).strftime("%Y-%m-%d")
+
+
+# Keep text columns fetched from DuckDB Arrow-backed instead of Python objects
+_arrow_string_dtypes = {pa.string(): pd.StringDtype("pyarrow")}
+
+
+def append_new_articles(
+    context: dg.AssetExecutionContext, table_name: str, batch: pd.DataFrame
+) -> Optional[Tuple[pd.DataFrame, int]]:
+    """
+    Append articles from batch whose URL is not yet stored in raw.<table_name>.
+
+    Deduplication runs inside DuckDB against a unique index on url, so
+    existing articles never round-trip through pandas.
+    Returns the newly inserted rows and the total row count of the table,
+    or None when nothing is accumulated. Write errors propagate, so a failed
+    append fails the run.
+    """
+    if use_postgres():
+        # The accumulated raw.* tables are DuckDB-only. With PostgreSQL the
+        # I/O manager stores each run's batch and history is not kept, rather
+        # than splitting it into a container-local DuckDB file
+        context.log.info(f"Using PostgreSQL, not accumulating raw.{table_name}")
+        return None
+
+    # One connection per append, so the file lock is only held while writing
+    # and the README's duckdb CLI can open the database between runs
+    with context.resources.duckdb.get_connection() as conn:
+        try:
+            # Only scan explicitly registered DataFrames; otherwise a missing
+            # table such as raw.processed_news resolves to the asset of the
+            # same name
+            conn.execute("SET python_enable_replacements = false")
+            # The registered batch is a zero-copy view over the DataFrame; the
+            # INSERT ... SELECT below bulk-loads it without per-row binding
+            conn.register("new_batch", batch)
+
+            # Idempotent setup: creates the empty table on first run and adds
+            # the url index to tables written before it existed. The index
+            # lets DuckDB skip stored articles without scanning the table.
+            conn.execute(f"""
+                CREATE SCHEMA IF NOT EXISTS raw;
+                CREATE TABLE IF NOT EXISTS raw.{table_name} AS
+                    SELECT * FROM new_batch LIMIT 0;
+                CREATE UNIQUE INDEX IF NOT EXISTS {table_name}_url_idx
+                    ON raw.{table_name} (url);
+            """)
+            if "publishedAt" in batch.columns:
+                # Readers get newest-first ordering from the view, so the
+                # accumulated table itself is never re-sorted
+                conn.execute(f"""
+                    CREATE VIEW IF NOT EXISTS raw.{table_name}_sorted AS
+                    SELECT * FROM raw.{table_name} ORDER BY publishedAt DESC
+                """)
+
+            new_rows = (
+                conn.execute(f"""
+                    INSERT INTO raw.{table_name} BY NAME
+                    SELECT * FROM new_batch
+                    ON CONFLICT (url) DO NOTHING
+                    RETURNING *
+                """)
+                .fetch_arrow_table()
+                .to_pandas(types_mapper=_arrow_string_dtypes.get)
+            )
+
+            count_query = f"SELECT COUNT(*) FROM raw.{table_name}"
+            total_count = conn.execute(count_query).fetchone()[0]
+        finally:
+            # DuckDBResource only closes the connection when the block
+            # succeeds; close it here so a failed append releases the file too
+            conn.close()
+
+    return new_rows, total_count
+
+
+def build_preview(df: pd.DataFrame, limit: int) -> dg.MetadataValue:
+    """Build a table preview of the first articles for the asset metadata"""
+    preview_cols = [
+        col for col in ["title", "source_name", "publishedAt"] if col in df.columns
+    ]
+    if df.empty or not preview_cols:
+        # An empty table renders as a blank, schema-less block in the UI
+        return dg.MetadataValue.md("No articles")
+    # Project the preview columns before slicing so only they get stringified
+    preview_df = df.loc[:, preview_cols].head(limit)
+
+    return dg.MetadataValue.table(
+        records=[
+            dg.TableRecord(
+                {
+                    col: None if pd.isna(value) else str(value)
+                    for col, value in zip(preview_cols, row)
+                }
+            )
+            for row in preview_df.itertuples(index=False)
+        ],
+        schema=dg.TableSchema(
+            columns=[dg.TableColumn(name=col, type="string") for col in preview_cols]
+        ),
+    )
+
+
+def filter_and_clean(processed: pd.DataFrame) -> pd.DataFrame:
+    """
+    Drop articles without a usable title, body/description or published date.
+    Rows keep their incoming order; filtered_news sorts what it stores.
+    """
+    # Determine which content field to use (eventregistry uses 'body' instead of 'description')
+    content_field = "body" if "body" in processed.columns else "description"
+
+    # Arrow-backed strings let the checks below run as pyarrow compute kernels
+    text_columns = [col for col in ["title", content_field] if col in processed.columns]
+    articles = processed.astype(
+        {col: "string[pyarrow]" for col in text_columns}, copy=False
+    )
+
+    # Convert publishedAt to datetime if not already, so date validity can be
+    # checked in the same mask as the content
+    if "publishedAt" in articles.columns:
+        # ai_marketing_news_raw already parses it, so this is usually skipped.
+        # Format inference and naive timestamps are kept on purpose: an ISO8601
+        # format would drop other date strings and utc=True would shift them
+        if not is_datetime64_any_dtype(articles["publishedAt"]):
+            articles["publishedAt"] = pd.to_datetime(
+                articles["publishedAt"], errors="coerce"
+            )
+
+    # Missing text counts as empty, so the string checks never yield NA
+    title = articles["title"].fillna("")
+
+    # Filter out articles without essential content
+    filter_conditions = articles["title"].notna()
+    if content_field in articles.columns:
+        content = articles[content_field].fillna("")
+        filter_conditions = (
+            filter_conditions
+            & (content.str.strip().str.len() > 0)
+            & (title != "[Removed]")
+            & (title.str.strip().str.len() > 0)
+            & (content != "[Removed]")
+        )
+    if "publishedAt" in articles.columns:
+        # Remove articles with invalid dates
+        filter_conditions &= articles["publishedAt"].notna()
+
+    # One boolean index for all checks; clean batches (the common case) skip
+    # the copy entirely
+    if filter_conditions.all():
+        return articles
+    return articles[filter_conditions]
 
 
 ################# Assets #################
@@ -49,8 +211,15 @@ def ai_marketing_news_raw(context: dg.AssetExecutionContext) -> pd.DataFrame:
     Fetch news articles that contain BOTH AI and Marketing keywords using newsapi.ai.
     Uses incremental loading based on last fetch timestamp.
     """
+    # Read the clock once so fetched_at, the stored fetch timestamp and the
+    # default lookback window all refer to the same instant
+    now_utc = datetime.now(timezone.utc)
+    now_local = now_utc.astimezone()
+
     # Get last fetch time for incremental loading
-    from_date = get_last_fetch_timestamp(context, "raw/ai_marketing_news_raw")
+    from_date = get_last_fetch_timestamp(
+        context, "raw/ai_marketing_news_raw", now=now_local
+    )
 
     context.log.info(f"Fetching articles about AI and Marketing since {from_date}")
 
@@ -69,9 +238,21 @@ def ai_marketing_news_raw(context: dg.AssetExecutionContext) -> pd.DataFrame:
         )
 
         articles = []
+        # Unpack the nested source dict while iterating, column by column
+        source_names = []
+        source_uris = []
+        er = get_eventregistry_client()
         for article in q.execQuery(er, sortBy="relevance", maxItems=100):
             articles.append(article)
 
+            source = article.get("source")
+            if isinstance(source, dict):
+                source_names.append(source.get("title"))
+                source_uris.append(source.get("uri"))
+            else:
+                source_names.append(str(source) if source else None)
+                source_uris.append(None)
+
         context.log.info(f"Fetched {len(articles)} articles about AI and Marketing")
 
         # Convert to DataFrame
@@ -79,7 +260,8 @@ def ai_marketing_news_raw(context: dg.AssetExecutionContext) -> pd.DataFrame:
 
         if not df.empty:
             # Add metadata columns
-            df["fetched_at"] = datetime.now()
+            # Naive local time, matching the existing fetched_at column type
+            df["fetched_at"] = pd.Timestamp(now_local.replace(tzinfo=None))
 
             # Map eventregistry fields to consistent schema
             if "uri" in df.columns:
@@ -93,36 +275,24 @@ def ai_marketing_news_raw(context: dg.AssetExecutionContext) -> pd.DataFrame:
 
             # Handle source information
             if "source" in df.columns:
-                df["source_name"] = df["source"].apply(
-                    lambda x: x.get("title")
-                    if isinstance(x, dict)
-                    else str(x)
-                    if x
-                    else None
-                )
-                df["source_uri"] = df["source"].apply(
-                    lambda x: x.get("uri") if isinstance(x, dict) else None
-                )
+                df["source_name"] = pd.array(source_names, dtype="string[pyarrow]")
+                df["source_uri"] = pd.array(source_uris, dtype="string[pyarrow]")
+
+            # Arrow-backed text lets DuckDB scan these columns without
+            # encoding every Python string object on write
+            text_columns = ["title", "url", "article_id", "body"]
+            df = df.astype(
+                {col: "string[pyarrow]" for col in text_columns if col in df.columns},
+                copy=False,
+            )
 
         # Log metadata
         context.add_output_metadata(
             {
                 "num_articles": len(df),
-                "last_fetch_timestamp": dg.MetadataValue.timestamp(
-                    datetime.now(timezone.utc)
-                ),
+                "last_fetch_timestamp": dg.MetadataValue.timestamp(now_utc),
                 "from_date": from_date,
-                "preview": dg.MetadataValue.md(
-                    df[["title", "source_name", "publishedAt"]].head(5).to_markdown()
-                    if not df.empty
-                    and all(
-                        col in df.columns
-                        for col in ["title", "source_name", "publishedAt"]
-                    )
-                    else df.head(5).to_markdown()
-                    if not df.empty
-                    else "No articles"
-                ),
+                "preview": build_preview(df, limit=5),
             }
         )
 
@@ -137,6 +307,10 @@ def ai_marketing_news_raw(context: dg.AssetExecutionContext) -> pd.DataFrame:
 @dg.asset(
     group_name="processed_news",
     key_prefix=["processed"],
+    # The I/O manager stores the latest deduplicated batch here; the
+    # accumulated history lives in raw.processed_news.
+    metadata={"schema": "processed"},
+    required_resource_keys={"duckdb"},
     ins={
         "ai_marketing_news_raw": dg.AssetIn(
             key=dg.AssetKey(["raw", "ai_marketing_news_raw"])
@@ -150,7 +324,9 @@ def processed_news(
     """
     Process AI and Marketing news articles.
     Removes duplicates based on URL and standardizes the data format.
-    Accumulates processed articles over time instead of overwriting.
+    Accumulates processed articles in raw.processed_news. The whole batch is
+    returned, not just the newly stored articles, so a run that fails
+    downstream still hands every article to filtered_news when retried.
     """
     context.log.info(f"Processing {len(ai_marketing_news_raw)} raw articles")
 
@@ -158,81 +334,54 @@ def processed_news(
         context.log.info("No raw articles to process")
         return ai_marketing_news_raw
 
-    # Load existing processed articles from database
-    existing_processed = pd.DataFrame()
-    try:
-        import duckdb
-
-        db_path = (
-            context.resources.io_manager.database
-            if hasattr(context.resources.io_manager, "database")
-            else "data/news.duckdb"
-        )
-
-        try:
-            conn = duckdb.connect(db_path)
-            existing_tables = conn.execute("""
-                SELECT table_name FROM information_schema.tables 
-                WHERE table_schema = 'raw' AND table_name = 'processed_news'
-            """).fetchall()
-
-            if existing_tables:
-                existing_processed = conn.execute(
-                    "SELECT * FROM raw.processed_news"
-                ).fetchdf()
-                context.log.info(
-                    f"Loaded {len(existing_processed)} existing processed articles"
-                )
-            conn.close()
-        except Exception as e:
-            context.log.info(f"No existing processed data found: {str(e)}")
-    except Exception as e:
-        context.log.info(f"Could not load existing processed data: {str(e)}")
-
     # Process the raw data (remove duplicates within current batch)
     initial_count = len(ai_marketing_news_raw)
-    processed = ai_marketing_news_raw.drop_duplicates(subset=["url"], keep="first")
+    processed = ai_marketing_news_raw[
+        ~ai_marketing_news_raw["url"].duplicated(keep="first")
+    ]
     duplicates_in_batch = initial_count - len(processed)
 
     context.log.info(f"Removed {duplicates_in_batch} duplicates within current batch")
 
-    # Merge with existing processed data
-    if not existing_processed.empty:
-        # Combine existing and newly processed data
-        combined = pd.concat([existing_processed, processed], ignore_index=True)
+    metadata = {
+        "new_articles_processed": len(processed),
+        "duplicates_removed": duplicates_in_batch,
+        "date_range": f"{processed['publishedAt'].min()} to {processed['publishedAt'].max()}"
+        if not processed.empty and "publishedAt" in processed.columns
+        else "N/A",
+    }
 
-        # Remove duplicates globally (keep first occurrence = older articles)
-        before_dedup = len(combined)
-        combined = combined.drop_duplicates(subset=["url"], keep="first")
-        global_duplicates = before_dedup - len(combined)
+    # Append to the accumulated table, skipping URLs that are already stored
+    stored = append_new_articles(context, "processed_news", processed)
+    if stored is not None:
+        new_processed, total_count = stored
+        global_duplicates = len(processed) - len(new_processed)
 
         context.log.info(
-            f"Combined {len(existing_processed)} existing + {len(processed)} new = {len(combined)} total (removed {global_duplicates} duplicates)"
+            f"Stored {len(new_processed)} new articles, {total_count} total (removed {global_duplicates} already stored)"
+        )
+        metadata.update(
+            {
+                "total_articles": total_count,
+                "new_articles_stored": len(new_processed),
+                "duplicates_removed": duplicates_in_batch + global_duplicates,
+                "existing_articles": total_count - len(new_processed),
+            }
         )
-        final_processed = combined
-    else:
-        context.log.info(f"First run: storing {len(processed)} processed articles")
-        final_processed = processed
 
     # Log metadata
-    context.add_output_metadata(
-        {
-            "total_articles": len(final_processed),
-            "new_articles_processed": len(processed),
-            "duplicates_removed": duplicates_in_batch,
-            "existing_articles": len(existing_processed),
-            "date_range": f"{final_processed['publishedAt'].min()} to {final_processed['publishedAt'].max()}"
-            if not final_processed.empty and "publishedAt" in final_processed.columns
-            else "N/A",
-        }
-    )
+    context.add_output_metadata(metadata)
 
-    return final_processed
+    return processed
 
 
 @dg.asset(
     group_name="final_news",
     key_prefix=["final"],
+    # The I/O manager stores the latest filtered batch here; the
+    # accumulated history lives in raw.filtered_news.
+    metadata={"schema": "final"},
+    required_resource_keys={"duckdb"},
     ins={
         "processed_news": dg.AssetIn(key=dg.AssetKey(["processed", "processed_news"]))
     },
@@ -246,7 +395,8 @@ def filtered_news(
     - Remove articles with [Removed] content
     - Validate published dates
     - Sort by publication date
-    Accumulates filtered articles over time instead of overwriting.
+    Accumulates filtered articles in raw.filtered_news and returns the whole
+    filtered batch; articles already stored are skipped by the append.
     """
     context.log.info(f"Filtering {len(processed_news)} processed articles")
 
@@ -256,109 +406,47 @@ def filtered_news(
         context.log.info("No processed articles to filter")
         return processed_news
 
-    # Load existing filtered articles from database
-    existing_filtered = pd.DataFrame()
-    try:
-        import duckdb
-
-        db_path = (
-            context.resources.io_manager.database
-            if hasattr(context.resources.io_manager, "database")
-            else "data/news.duckdb"
-        )
-
-        try:
-            conn = duckdb.connect(db_path)
-            existing_tables = conn.execute("""
-                SELECT table_name FROM information_schema.tables 
-                WHERE table_schema = 'raw' AND table_name = 'filtered_news'
-            """).fetchall()
-
-            if existing_tables:
-                existing_filtered = conn.execute(
-                    "SELECT * FROM raw.filtered_news"
-                ).fetchdf()
-                context.log.info(
-                    f"Loaded {len(existing_filtered)} existing filtered articles"
-                )
-            conn.close()
-        except Exception as e:
-            context.log.info(f"No existing filtered data found: {str(e)}")
-    except Exception as e:
-        context.log.info(f"Could not load existing filtered data: {str(e)}")
-
-    # Determine which content field to use (eventregistry uses 'body' instead of 'description')
-    content_field = "body" if "body" in processed_news.columns else "description"
-
-    # Filter out articles without essential content
-    filter_conditions = processed_news["title"].notna()
-    if content_field in processed_news.columns:
-        filter_conditions = (
-            filter_conditions
-            & processed_news[content_field].notna()
-            & processed_news[content_field].str.strip().ne("")
-            & (processed_news["title"] != "[Removed]")
-            & processed_news["title"].str.strip().ne("")
-            & (processed_news[content_field] != "[Removed]")
-        )
-
-    filtered = processed_news[filter_conditions].copy()
-
-    # Convert publishedAt to datetime if not already
-    if "publishedAt" in filtered.columns:
-        filtered["publishedAt"] = pd.to_datetime(
-            filtered["publishedAt"], errors="coerce"
-        )
-        # Remove articles with invalid dates
-        filtered = filtered[filtered["publishedAt"].notna()]
+    filtered = filter_and_clean(processed_news)
 
     removed_count = initial_count - len(filtered)
     context.log.info(f"Removed {removed_count} invalid articles from current batch")
 
-    # Merge with existing filtered data
-    if not existing_filtered.empty:
-        # Combine existing and newly filtered data
-        combined = pd.concat([existing_filtered, filtered], ignore_index=True)
+    metadata = {
+        "new_articles_filtered": len(filtered),
+        "removed_articles": removed_count,
+    }
 
-        # Remove duplicates by URL (keep first occurrence)
-        before_dedup = len(combined)
-        combined = combined.drop_duplicates(subset=["url"], keep="first")
-        global_duplicates = before_dedup - len(combined)
+    # Append to the accumulated table, skipping URLs that are already stored
+    stored = append_new_articles(context, "filtered_news", filtered)
+    if stored is not None:
+        new_filtered, total_count = stored
+        global_duplicates = len(filtered) - len(new_filtered)
 
         context.log.info(
-            f"Combined {len(existing_filtered)} existing + {len(filtered)} new = {len(combined)} total (removed {global_duplicates} duplicates)"
+            f"Stored {len(new_filtered)} new articles, {total_count} total (removed {global_duplicates} already stored)"
+        )
+        metadata.update(
+            {
+                "total_articles": total_count,
+                "new_articles_stored": len(new_filtered),
+                "existing_articles": total_count - len(new_filtered),
+            }
         )
-        final_filtered = combined
-    else:
-        context.log.info(f"First run: storing {len(filtered)} filtered articles")
-        final_filtered = filtered
-
-    # Sort by publication date (newest first)
-    if "publishedAt" in final_filtered.columns:
-        final_filtered = final_filtered.sort_values("publishedAt", ascending=False)
-
-    # Prepare preview columns
-    preview_cols = ["title", "source_name", "publishedAt"]
-    available_preview_cols = [
-        col for col in preview_cols if col in final_filtered.columns
-    ]
+
+    # Sort the batch by publication date (newest first); the accumulated
+    # table is read in order through raw.filtered_news_sorted
+    if "publishedAt" in filtered.columns:
+        filtered = filtered.sort_values("publishedAt", ascending=False)
 
     # Log metadata
-    context.add_output_metadata(
+    metadata.update(
         {
-            "total_articles": len(final_filtered),
-            "new_articles_filtered": len(filtered),
-            "removed_articles": removed_count,
-            "existing_articles": len(existing_filtered),
-            "date_range": f"{final_filtered['publishedAt'].min()} to {final_filtered['publishedAt'].max()}"
-            if not final_filtered.empty and "publishedAt" in final_filtered.columns
+            "date_range": f"{filtered['publishedAt'].min()} to {filtered['publishedAt'].max()}"
+            if not filtered.empty and "publishedAt" in filtered.columns
             else "N/A",
-            "preview": dg.MetadataValue.md(
-                final_filtered[available_preview_cols].head(10).to_markdown()
-                if not final_filtered.empty and available_preview_cols
-                else "No articles"
-            ),
+            "preview": build_preview(filtered, limit=10),
         }
     )
+    context.add_output_metadata(metadata)
 
-    return final_filtered
+    return filtered
@@ -14,6 +14,11 @@ def get_database_path():
     return str(db_path)
 
 
+def use_postgres() -> bool:
+    """Whether assets are stored in PostgreSQL rather than the local DuckDB file"""
+    return os.getenv("USE_POSTGRES", "false").lower() == "true"
+
+
 def get_io_manager():
     """
     Get the appropriate I/O manager based on environment configuration.
@@ -28,9 +33,7 @@ def get_io_manager():
     Returns:
         IOManager: Either DuckDBPandasIOManager or PostgresPandasIOManager
     """
-    use_postgres = os.getenv("USE_POSTGRES", "false").lower() == "true"
-
-    if use_postgres:
+    if use_postgres():
         # PostgreSQL configuration for production
         from dagster_postgres.utils import get_conn_string
         from dagster_postgres import PostgresPandasIOManager
@@ -7,7 +7,7 @@ Sensors run periodically to check for asset materialization failures and alert t
 
 import os
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Tuple
 import dagster as dg
 from dagster import (
     sensor,
@@ -15,10 +15,57 @@ from dagster import (
     SensorEvaluationContext,
     DagsterRunStatus,
     RunsFilter,
-    DagsterEventType,
 )
 
 
+# Most failed runs fetched per window; a full page means there may be more
+FAILED_RUNS_LIMIT = 25
+
+# Failed run records shared by both hourly sensors, keyed by the start of their window and the limit
+_failed_runs_cache: Dict[Tuple[datetime, int], List[dg.RunRecord]] = {}
+
+
+def fetch_failed_runs(
+    instance: dg.DagsterInstance, since: datetime, limit: int = FAILED_RUNS_LIMIT
+) -> List[dg.RunRecord]:
+    """
+    Get records of runs that failed since the given time, newest first.
+
+    Both sensors query the same one-hour window every hour. The window start is
+    truncated to the minute and the result cached per window and limit, so the
+    sensor evaluated second reuses the first one's query instead of hitting the
+    run storage again. The second sensor's result can therefore be up to about
+    a minute stale: runs that failed after the first sensor's query are left
+    for its next evaluation.
+    """
+    since = since.replace(second=0, microsecond=0)
+    key = (since, limit)
+
+    # Sensors may be evaluated concurrently, so never read back an entry
+    # another evaluation could have cleared in the meantime
+    cached = _failed_runs_cache.get(key)
+    if cached is not None:
+        return cached
+
+    runs_filter = RunsFilter(
+        statuses=[DagsterRunStatus.FAILURE],
+        created_after=since,
+    )
+    records = list(
+        instance.get_run_records(
+            filters=runs_filter,
+            limit=limit,
+            order_by="create_timestamp",
+            ascending=False,
+        )
+    )
+    # Only the latest window is ever requested again
+    _failed_runs_cache.clear()
+    _failed_runs_cache[key] = records
+
+    return records
+
+
 @sensor(
     name="pipeline_failure_alert_sensor",
     description="Monitors asset failures and sends batched hourly alerts",
@@ -47,14 +94,9 @@ def pipeline_failure_sensor(context: SensorEvaluationContext):
     one_hour_ago = current_time - timedelta(hours=1)
 
     # Get all runs that failed in the last hour
-    runs_filter = RunsFilter(
-        statuses=[DagsterRunStatus.FAILURE],
-        created_after=one_hour_ago,
-    )
-
-    failed_runs = context.instance.get_runs(filters=runs_filter, limit=100)
+    failed_records = fetch_failed_runs(context.instance, one_hour_ago)
 
-    if not failed_runs:
+    if not failed_records:
         # No failures detected - update cursor and return
         context.update_cursor(current_time.isoformat())
         context.log.info("No failures detected in the last hour")
@@ -62,30 +104,38 @@ def pipeline_failure_sensor(context: SensorEvaluationContext):
 
     # Collect failure information
     failure_details = []
-    for run in failed_runs:
-        # Get asset materialization events from the run
-        events = context.instance.all_logs(
-            run.run_id, of_type=DagsterEventType.ASSET_MATERIALIZATION
-        )
-
+    for record in failed_records:
+        run = record.dagster_run
         failure_info = {
             "run_id": run.run_id,
             "job_name": run.job_name,
             "status": run.status.value,
-            "created_time": run.create_timestamp,
+            "created_time": record.create_timestamp.timestamp(),
             "tags": run.tags,
         }
         failure_details.append(failure_info)
 
+    # A full page means the query was capped, so the count is a lower bound
+    truncated = len(failed_records) >= FAILED_RUNS_LIMIT
+    failure_count = f"{len(failure_details)}+" if truncated else len(failure_details)
+
     # Send batched alert notification
     if failure_details:
         context.log.warning(
-            f"ALERT: {len(failure_details)} pipeline failure(s) detected in the last hour"
+            f"ALERT: {failure_count} pipeline failure(s) detected in the last hour"
         )
+        if truncated:
+            context.log.warning(
+                f"Only the latest {FAILED_RUNS_LIMIT} failed runs were fetched; "
+                "older failures in the last hour are not listed"
+            )
 
         # Call notification function
         send_failure_notification(
-            context=context, failures=failure_details, time_window="last hour"
+            context=context,
+            failures=failure_details,
+            time_window="last hour",
+            truncated=truncated,
         )
 
     # Update cursor to current time
@@ -93,7 +143,10 @@ def pipeline_failure_sensor(context: SensorEvaluationContext):
 
 
 def send_failure_notification(
-    context: SensorEvaluationContext, failures: List[Dict], time_window: str
+    context: SensorEvaluationContext,
+    failures: List[Dict],
+    time_window: str,
+    truncated: bool = False,
 ):
     """
     Send failure notification via email or other channels.
@@ -105,6 +158,8 @@ def send_failure_notification(
         context: Dagster sensor context for logging
         failures: List of failure information dictionaries
         time_window: Human-readable time window (e.g., "last hour")
+        truncated: Whether failures was capped by the query limit, making
+            its length a lower bound
     """
 
     # --- PSEUDOCODE: Email Notification via SMTP ---
@@ -240,9 +295,10 @@ def send_failure_notification(
             "alert_type": "pipeline_failure",
             "time_window": time_window,
             "failure_count": len(failures),
+            "failure_count_truncated": truncated,
             "failures": failures,
             "timestamp": datetime.now().isoformat(),
-            "severity": "high" if len(failures) > 5 else "medium",
+            "severity": "high" if truncated or len(failures) > 5 else "medium",
         },
     )
 
@@ -285,14 +341,17 @@ def asset_failure_sensor(context: SensorEvaluationContext):
     asset_failures = {}
 
     # Query for failed materializations
-    runs_filter = RunsFilter(
-        statuses=[DagsterRunStatus.FAILURE],
-        created_after=one_hour_ago,
-    )
+    failed_records = fetch_failed_runs(context.instance, one_hour_ago)
 
-    failed_runs = context.instance.get_runs(filters=runs_filter, limit=100)
+    if not failed_records:
+        context.update_cursor(current_time.isoformat())
+        context.log.info(
+            "All monitored assets materialized successfully in the last hour"
+        )
+        return
 
-    for run in failed_runs:
+    for record in failed_records:
+        run = record.dagster_run
         # Check if this run involved our monitored assets
         if run.asset_selection:
             for asset_key in run.asset_selection:
@@ -304,18 +363,23 @@ def asset_failure_sensor(context: SensorEvaluationContext):
                     asset_failures[asset_name].append(
                         {
                             "run_id": run.run_id,
-                            "timestamp": run.create_timestamp,
+                            "timestamp": record.create_timestamp.timestamp(),
                         }
                     )
 
+    # A full page means the query was capped, so counts are lower bounds
+    truncated = len(failed_records) >= FAILED_RUNS_LIMIT
+
     # Log asset-specific failures
     if asset_failures:
         for asset_name, failures in asset_failures.items():
+            failure_count = f"{len(failures)}+" if truncated else len(failures)
             context.log.warning(
-                f"Asset '{asset_name}' failed {len(failures)} time(s) in the last hour",
+                f"Asset '{asset_name}' failed {failure_count} time(s) in the last hour",
                 extra={
                     "asset_name": asset_name,
                     "failure_count": len(failures),
+                    "failure_count_truncated": truncated,
                     "failures": failures,
                 },
             )
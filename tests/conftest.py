@@ -4,78 +4,165 @@ Pytest configuration and fixtures for testing the news pipeline.
 This module provides reusable fixtures for loading test data and mocking Dagster components.
 """
 
-import json
+import orjson
 import pytest
+from functools import lru_cache
 import pandas as pd
 from pathlib import Path
+from types import MappingProxyType
 from unittest.mock import Mock
-from dagster import OpExecutionContext, build_op_context
+from dagster import DagsterInstance, OpExecutionContext, build_op_context
+from dagster_duckdb import DuckDBResource
 
+from newsapi_dentsu.defs.assets import (
+    filter_and_clean,
+    filtered_news,
+    processed_news,
+)
 
-@pytest.fixture
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+@lru_cache(maxsize=1)
+def _load_sample_news():
+    """Parse the sample news JSON once per process, whatever fixture asks for it"""
+    raw = (FIXTURES_DIR / "sample_news.json").read_bytes()
+    return tuple(orjson.loads(raw))
+
+
+@pytest.fixture(scope="session")
 def sample_news_data():
     """
     Load sample news data from the fixtures JSON file.
+
+    A tuple so tests cannot change it for each other.
     
     Returns:
-        list: List of dictionaries containing sample news articles
+        tuple: Dictionaries containing sample news articles
+    """
+    return _load_sample_news()
+
+
+@pytest.fixture(scope="session")
+def _base_news_df(sample_news_data):
+    """
+    Build the sample news DataFrame once per session.
+
+    Shaped like ai_marketing_news_raw output: publishedAt is parsed (invalid
+    dates become NaT) and text columns are Arrow-backed, so tests exercise the
+    same string kernels as production. Fixtures below hand out copies, so
+    tests never see each other's changes.
     """
-    fixtures_path = Path(__file__).parent / "fixtures" / "sample_news.json"
-    with open(fixtures_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    df = pd.DataFrame(sample_news_data)
+    df["publishedAt"] = pd.to_datetime(df["dateTime"], errors="coerce")
+    return df.astype({col: "string[pyarrow]" for col in ["title", "url", "body"]})
 
 
 @pytest.fixture
-def sample_news_df(sample_news_data):
+def sample_news_df(_base_news_df):
     """
     Convert sample news data to a pandas DataFrame.
     
     Returns:
         pd.DataFrame: DataFrame with sample news articles
     """
-    return pd.DataFrame(sample_news_data)
+    return _base_news_df.copy()
 
 
 @pytest.fixture
-def valid_articles_df(sample_news_data):
+def valid_articles_df(_base_news_df):
     """
     Create a DataFrame with only valid articles (first 3 articles).
     
     Returns:
         pd.DataFrame: DataFrame with valid news articles only
     """
-    valid_articles = sample_news_data[:3]
-    return pd.DataFrame(valid_articles)
+    return _base_news_df.iloc[:3].reset_index(drop=True)
 
 
 @pytest.fixture
-def invalid_articles_df(sample_news_data):
+def invalid_articles_df(_base_news_df):
     """
     Create a DataFrame with invalid articles (articles 4-6).
     
     Returns:
         pd.DataFrame: DataFrame with invalid articles (no title, no body, [Removed])
     """
-    invalid_articles = sample_news_data[3:6]
-    return pd.DataFrame(invalid_articles)
+    return _base_news_df.iloc[3:6].reset_index(drop=True)
 
 
 @pytest.fixture
-def duplicate_articles_df(sample_news_data):
+def duplicate_articles_df(_base_news_df):
     """
     Create a DataFrame with duplicate URLs (articles 7-8).
     
     Returns:
         pd.DataFrame: DataFrame with duplicate articles
     """
-    duplicate_articles = sample_news_data[6:8]
-    return pd.DataFrame(duplicate_articles)
+    return _base_news_df.iloc[6:8].reset_index(drop=True)
 
 
-@pytest.fixture
-def mock_dagster_context():
+@pytest.fixture(scope="session")
+def all_invalid_df():
+    """
+    Create a DataFrame where every article fails a filter.
+
+    Shared by the session; copy it before adding rows or columns.
+    
+    Returns:
+        pd.DataFrame: Articles with an empty title, an empty body and [Removed] content
+    """
+    df = pd.DataFrame(
+        [
+            {
+                "title": "",
+                "url": "http://example.com/1",
+                "body": "Content",
+                "dateTime": "2024-12-15",
+            },
+            {
+                "title": "Title",
+                "url": "http://example.com/2",
+                "body": "",
+                "dateTime": "2024-12-15",
+            },
+            {
+                "title": "[Removed]",
+                "url": "http://example.com/3",
+                "body": "[Removed]",
+                "dateTime": "2024-12-15",
+            },
+        ]
+    )
+    df["publishedAt"] = pd.to_datetime(df["dateTime"], errors="coerce")
+    return df
+
+
+@pytest.fixture(scope="session")
+def dagster_instance():
+    """
+    Create one ephemeral Dagster instance for the whole session.
+
+    Setting up an instance is most of what build_op_context costs, so every
+    test context shares this one.
+    
+    Returns:
+        DagsterInstance: In-memory Dagster instance
+    """
+    instance = DagsterInstance.ephemeral()
+    yield instance
+    instance.dispose()
+
+
+@pytest.fixture(scope="session")
+def mock_dagster_context(dagster_instance):
     """
     Create a mock Dagster OpExecutionContext for testing.
+
+    Shared by the session; tests that stub instance methods should do so with
+    monkeypatch so the stub is undone afterwards. Which DuckDB file the duckdb
+    resource connects to is set by news_database and full_pipeline_result.
     
     Returns:
         OpExecutionContext: Mocked Dagster context with logging capabilities
@@ -84,15 +171,90 @@ def mock_dagster_context():
         resources={
             "io_manager": Mock(),
             "duckdb": Mock(),
-        }
+        },
+        instance=dagster_instance,
     )
     return context
 
 
-@pytest.fixture
+@pytest.fixture(autouse=True)
+def news_database(mock_dagster_context, tmp_path, monkeypatch):
+    """
+    Point the shared context's duckdb resource at a fresh DuckDB file per test.
+
+    The assets append to raw.* tables with a connection per materialization,
+    so swapping the resource's get_connection keeps each test's rows to itself.
+    
+    Returns:
+        Path: The test's DuckDB database file
+    """
+    db_path = tmp_path / "news.duckdb"
+    monkeypatch.setattr(
+        mock_dagster_context.resources.duckdb,
+        "get_connection",
+        DuckDBResource(database=str(db_path)).get_connection,
+    )
+    return db_path
+
+
+@pytest.fixture(scope="session")
+def filtered_result(_base_news_df):
+    """
+    Filter the full sample data once for the whole session.
+
+    Uses filter_and_clean directly, since the tests sharing this result check
+    which rows survive, not their order or storage; they must not modify it.
+    
+    Returns:
+        pd.DataFrame: Filtered sample articles, unsorted
+    """
+    return filter_and_clean(_base_news_df)
+
+
+@pytest.fixture(scope="session")
+def full_pipeline_result(mock_dagster_context, _base_news_df, tmp_path_factory):
+    """
+    Run processed_news then filtered_news over the full sample data once.
+
+    Shared by the session; tests must not modify the returned frames. The
+    runs write to their own session DuckDB file, so the result doesn't
+    depend on which test's news_database happens to be active.
+    
+    Returns:
+        tuple: (processed, filtered) DataFrames
+    """
+    db_path = tmp_path_factory.mktemp("full_pipeline") / "news.duckdb"
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(
+            mock_dagster_context.resources.duckdb,
+            "get_connection",
+            DuckDBResource(database=str(db_path)).get_connection,
+        )
+        processed = processed_news(mock_dagster_context, _base_news_df.copy())
+        return processed, filtered_news(mock_dagster_context, processed)
+
+
+@pytest.fixture(scope="session")
+def materialization_event_mock():
+    """
+    Create a mock materialization event carrying last_fetch_timestamp metadata.
+    
+    Returns:
+        Mock: Event whose timestamp falls on 2023-12-17
+    """
+    event = Mock()
+    event.asset_materialization.metadata = {
+        "last_fetch_timestamp": Mock(value=1702800000.0)  # Dec 17, 2023
+    }
+    return event
+
+
+@pytest.fixture(scope="session")
 def empty_dataframe():
     """
     Create an empty DataFrame with the expected news schema.
+
+    Shared by the session; tests that add rows or columns should copy it first.
     
     Returns:
         pd.DataFrame: Empty DataFrame with correct column structure
@@ -100,15 +262,17 @@ def empty_dataframe():
     return pd.DataFrame(columns=["title", "url", "body", "dateTime", "source"])
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_eventregistry_response():
     """
     Create a mock response from EventRegistry API.
+
+    Shared by the session, so the top level is a read-only mapping.
     
     Returns:
-        dict: Mocked API response structure
+        MappingProxyType: Mocked API response structure
     """
-    return {
+    return MappingProxyType({
         "articles": {
             "results": [
                 {
@@ -124,4 +288,4 @@ def mock_eventregistry_response():
                 }
             ]
         }
-    }
+    })
@@ -4,19 +4,40 @@ Unit tests for the news pipeline assets.
 Tests cover filtering, deduplication, date parsing, and error handling.
 """
 
+import duckdb
 import pytest
 import pandas as pd
+import dagster as dg
 from datetime import datetime
 from unittest.mock import Mock, patch
+from freezegun import freeze_time
 
 # Import functions from assets
 from newsapi_dentsu.defs.assets import (
+    build_preview,
     processed_news,
     filtered_news,
+    filter_and_clean,
     get_last_fetch_timestamp,
 )
 
 
+def query_news_database(db_path, sql):
+    """Run a query against a test's DuckDB file and return the result as a DataFrame"""
+    with duckdb.connect(str(db_path)) as conn:
+        return conn.execute(sql).df()
+
+
+def assert_valid_filtered_df(df):
+    """Assert every filtered article has a parsed date and usable title and body"""
+    assert df["publishedAt"].dtype.kind == "M"  # datetime64, with or without tz
+    assert df["publishedAt"].notna().all()
+    for col in ["title", "body"]:
+        assert df[col].notna().all()
+        assert (df[col].str.strip() != "").all()
+        assert not (df[col] == "[Removed]").any()
+
+
 class TestProcessedNews:
     """Tests for the processed_news asset (deduplication logic)"""
 
@@ -30,11 +51,6 @@ class TestProcessedNews:
             duplicate_articles_df["url"].iloc[0] == duplicate_articles_df["url"].iloc[1]
         )
 
-        # Add publishedAt column (required by the function)
-        duplicate_articles_df["publishedAt"] = pd.to_datetime(
-            duplicate_articles_df["dateTime"]
-        )
-
         # Process the DataFrame
         result = processed_news(mock_dagster_context, duplicate_articles_df)
 
@@ -47,9 +63,6 @@ class TestProcessedNews:
         self, mock_dagster_context, valid_articles_df
     ):
         """Test that articles with unique URLs are all preserved"""
-        # Add publishedAt column
-        valid_articles_df["publishedAt"] = pd.to_datetime(valid_articles_df["dateTime"])
-
         result = processed_news(mock_dagster_context, valid_articles_df)
 
         # All unique articles should be preserved
@@ -66,72 +79,54 @@ class TestProcessedNews:
 class TestFilteredNews:
     """Tests for the filtered_news asset (filtering and cleaning logic)"""
 
-    def test_filter_removes_articles_without_title(
-        self, mock_dagster_context, sample_news_df
-    ):
+    def test_filter_removes_articles_without_title(self, filtered_result):
         """Test that articles without titles are removed"""
-        # Add publishedAt column
-        sample_news_df["publishedAt"] = pd.to_datetime(
-            sample_news_df["dateTime"], errors="coerce"
-        )
-
-        result = filtered_news(mock_dagster_context, sample_news_df)
+        result = filtered_result
 
         # Check that no articles have empty titles
         assert result["title"].notna().all()
         assert (result["title"].str.strip() != "").all()
 
-    def test_filter_removes_articles_without_body(
-        self, mock_dagster_context, sample_news_df
-    ):
+    def test_filter_removes_articles_without_body(self, filtered_result):
         """Test that articles without body content are removed"""
-        # Add publishedAt column
-        sample_news_df["publishedAt"] = pd.to_datetime(
-            sample_news_df["dateTime"], errors="coerce"
-        )
-
-        result = filtered_news(mock_dagster_context, sample_news_df)
+        result = filtered_result
 
         # Check that no articles have empty body
         assert result["body"].notna().all()
         assert (result["body"].str.strip() != "").all()
 
-    def test_filter_removes_removed_content(self, mock_dagster_context, sample_news_df):
+    def test_filter_removes_removed_content(self, filtered_result):
         """Test that articles with '[Removed]' content are filtered out"""
-        # Add publishedAt column
-        sample_news_df["publishedAt"] = pd.to_datetime(
-            sample_news_df["dateTime"], errors="coerce"
-        )
-
-        result = filtered_news(mock_dagster_context, sample_news_df)
+        result = filtered_result
 
         # Check that no articles contain [Removed]
         assert not (result["title"] == "[Removed]").any()
         assert not (result["body"] == "[Removed]").any()
 
-    def test_date_parsing_handles_invalid_dates(
-        self, mock_dagster_context, sample_news_df
-    ):
+    def test_date_parsing_handles_invalid_dates(self, filtered_result):
         """Test that invalid date formats are handled gracefully"""
-        # Add publishedAt column with some invalid dates
-        sample_news_df["publishedAt"] = pd.to_datetime(
-            sample_news_df["dateTime"], errors="coerce"
+        result = filtered_result
+
+        # All remaining articles should have parsed, valid dates
+        assert result["publishedAt"].dtype.kind == "M"  # datetime64
+        assert result["publishedAt"].notna().all()
+
+    def test_date_parsing_accepts_non_iso_dates(self, valid_articles_df):
+        """Test that unparsed non-ISO date strings are kept as naive timestamps"""
+        articles = valid_articles_df.assign(
+            publishedAt=["15 Dec 2024 10:00", "14 Dec 2024 09:30", "13 Dec 2024 08:15"]
         )
 
-        result = filtered_news(mock_dagster_context, sample_news_df)
+        result = filter_and_clean(articles)
 
-        # All remaining articles should have valid dates
-        assert result["publishedAt"].notna().all()
-        # Check that dates are datetime objects
-        assert pd.api.types.is_datetime64_any_dtype(result["publishedAt"])
+        assert len(result) == 3
+        assert result["publishedAt"].dt.tz is None
+        assert result["publishedAt"].iloc[0] == pd.Timestamp("2024-12-15 10:00")
 
     def test_articles_sorted_by_date_descending(
         self, mock_dagster_context, valid_articles_df
     ):
         """Test that articles are sorted by publication date (newest first)"""
-        # Add publishedAt column
-        valid_articles_df["publishedAt"] = pd.to_datetime(valid_articles_df["dateTime"])
-
         result = filtered_news(mock_dagster_context, valid_articles_df)
 
         # Check that dates are in descending order
@@ -145,27 +140,151 @@ class TestFilteredNews:
         assert len(result) == 0
         assert isinstance(result, pd.DataFrame)
 
-    def test_valid_articles_pass_all_filters(
-        self, mock_dagster_context, valid_articles_df
-    ):
+    def test_valid_articles_pass_all_filters(self, valid_articles_df):
         """Test that valid articles pass through all filters"""
-        # Add publishedAt column
-        valid_articles_df["publishedAt"] = pd.to_datetime(valid_articles_df["dateTime"])
-
-        result = filtered_news(mock_dagster_context, valid_articles_df)
+        result = filter_and_clean(valid_articles_df)
 
         # All valid articles should pass filters (3 valid articles in fixture)
         assert len(result) == 3
+        assert_valid_filtered_df(result)
+
+    def test_filter_removes_missing_title_and_body(self, valid_articles_df):
+        """Test that null titles and bodies are dropped rather than raising"""
+        articles = valid_articles_df.copy()
+        articles.loc[0, "title"] = None
+        articles.loc[1, "body"] = None
+
+        result = filter_and_clean(articles)
+
+        assert result["url"].tolist() == [valid_articles_df.loc[2, "url"]]
+
+
+class TestAccumulatedStorage:
+    """Tests for appending new articles to the raw.* DuckDB tables"""
+
+    def test_second_run_stores_nothing_new(
+        self, mock_dagster_context, sample_news_df, news_database
+    ):
+        """Test that re-running processed_news on the same batch adds no rows"""
+        first = processed_news(mock_dagster_context, sample_news_df)
+        second = processed_news(mock_dagster_context, sample_news_df)
+
+        # The whole deduplicated batch is handed on both times
+        assert len(first) == len(second) == 9  # 10 - 1 duplicate
+
+        stored = query_news_database(
+            news_database, "SELECT url FROM raw.processed_news"
+        )
+        assert len(stored) == 9
+
+    def test_only_unseen_urls_are_stored(
+        self, mock_dagster_context, valid_articles_df, sample_news_df, news_database
+    ):
+        """Test that a partially stored batch appends just the unseen articles"""
+        processed_news(mock_dagster_context, valid_articles_df)
+        processed_news(mock_dagster_context, sample_news_df)
+
+        stored = query_news_database(
+            news_database, "SELECT url FROM raw.processed_news"
+        )
+        assert len(stored) == 9  # 3 from the first run + 6 unseen
+        assert stored["url"].is_unique
+
+    def test_retry_after_downstream_failure_stores_filtered_articles(
+        self, mock_dagster_context, sample_news_df, news_database, monkeypatch
+    ):
+        """Test that articles stored by processed_news survive a failed filtered_news"""
+        processed = processed_news(mock_dagster_context, sample_news_df)
+        with monkeypatch.context() as m:
+            m.setattr(
+                "newsapi_dentsu.defs.assets.filter_and_clean",
+                Mock(side_effect=RuntimeError("boom")),
+            )
+            with pytest.raises(RuntimeError, match="boom"):
+                filtered_news(mock_dagster_context, processed)
+
+        # Retry the whole run with the same raw batch
+        processed = processed_news(mock_dagster_context, sample_news_df)
+        filtered = filtered_news(mock_dagster_context, processed)
+
+        stored = query_news_database(news_database, "SELECT url FROM raw.filtered_news")
+        assert len(filtered) > 0
+        assert len(stored) == len(filtered)
+
+    def test_postgres_backend_skips_accumulation(
+        self, mock_dagster_context, sample_news_df, news_database, monkeypatch
+    ):
+        """Test that no raw.* DuckDB tables are written when using PostgreSQL"""
+        monkeypatch.setenv("USE_POSTGRES", "true")
+
+        processed = processed_news(mock_dagster_context, sample_news_df)
+        filtered = filtered_news(mock_dagster_context, processed)
+
+        assert len(processed) == 9
+        assert len(filtered) > 0
+        assert not news_database.exists()
+
+    def test_sorted_view_is_created(
+        self, mock_dagster_context, sample_news_df, news_database
+    ):
+        """Test that raw.processed_news_sorted reads newest articles first"""
+        processed_news(mock_dagster_context, sample_news_df)
+
+        dates = query_news_database(
+            news_database, "SELECT publishedAt FROM raw.processed_news_sorted"
+        )["publishedAt"]
+        assert dates.dropna().is_monotonic_decreasing
+
+    def test_write_failure_fails_the_run(
+        self, mock_dagster_context, sample_news_df, news_database
+    ):
+        """Test that an error writing raw.processed_news is raised, not swallowed"""
+        # A url column that can't hold the batch's URLs makes the insert fail
+        query_news_database(
+            news_database,
+            "CREATE SCHEMA raw; CREATE TABLE raw.processed_news (url INTEGER)",
+        )
+
+        with pytest.raises(duckdb.Error):
+            processed_news(mock_dagster_context, sample_news_df)
+
+        # The failed append released its connection, so the file opens again
+        # with a different configuration
+        stored = query_news_database(news_database, "SELECT * FROM raw.processed_news")
+        assert stored.empty
+
+
+class TestBuildPreview:
+    """Tests for the build_preview metadata helper"""
+
+    def test_preview_lists_first_articles(self, valid_articles_df):
+        """Test that the preview holds one record per article up to the limit"""
+        preview = build_preview(valid_articles_df, limit=2)
+
+        assert isinstance(preview, dg.TableMetadataValue)
+        assert len(preview.records) == 2
+
+    def test_empty_batch_shows_message(self, empty_dataframe):
+        """Test that an empty batch gets a 'No articles' message, not an empty table"""
+        preview = build_preview(empty_dataframe, limit=10)
+
+        assert preview == dg.MetadataValue.md("No articles")
 
 
 class TestGetLastFetchTimestamp:
     """Tests for the get_last_fetch_timestamp helper function"""
 
-    def test_returns_default_when_no_previous_run(self, mock_dagster_context):
+    @freeze_time("2024-12-15")
+    def test_returns_default_when_no_previous_run(
+        self, mock_dagster_context, monkeypatch
+    ):
         """Test that default date (7 days ago) is returned when no previous materialization"""
         # Mock the instance to return None for latest materialization
-        mock_dagster_context.instance.get_latest_materialization_event = Mock(
-            return_value=None
+        # (monkeypatch restores the shared instance after the test)
+        monkeypatch.setattr(
+            mock_dagster_context.instance,
+            "get_latest_materialization_events",
+            Mock(return_value={}),
         )
 
         result = get_last_fetch_timestamp(mock_dagster_context, "test_asset")
@@ -174,21 +293,18 @@ class TestGetLastFetchTimestamp:
         assert isinstance(result, str)
         assert len(result) == 10  # YYYY-MM-DD format
 
-        # Verify it's approximately 7 days ago
-        from datetime import datetime, timedelta
-
-        expected_date = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-        assert result == expected_date
+        # Verify it's 7 days before the frozen clock
+        assert result == "2024-12-08"
 
-    def test_returns_previous_timestamp_when_available(self, mock_dagster_context):
+    def test_returns_previous_timestamp_when_available(
+        self, mock_dagster_context, monkeypatch, materialization_event_mock
+    ):
         """Test that previous timestamp is returned when available"""
-        # Mock a previous materialization with timestamp metadata
-        mock_event = Mock()
-        mock_event.asset_materialization.metadata = {
-            "last_fetch_timestamp": Mock(value=1702800000.0)  # Dec 17, 2023
-        }
-        mock_dagster_context.instance.get_latest_materialization_event = Mock(
-            return_value=mock_event
+        # Return a previous materialization with timestamp metadata
+        monkeypatch.setattr(
+            mock_dagster_context.instance,
+            "get_latest_materialization_events",
+            Mock(return_value={dg.AssetKey("test_asset"): materialization_event_mock}),
         )
 
         result = get_last_fetch_timestamp(mock_dagster_context, "test_asset")
@@ -201,21 +317,16 @@ class TestGetLastFetchTimestamp:
 class TestIntegrationScenarios:
     """Integration tests for common pipeline scenarios"""
 
-    def test_full_pipeline_with_mixed_articles(
-        self, mock_dagster_context, sample_news_df
-    ):
-        """Test the full pipeline flow with a mix of valid and invalid articles"""
-        # Step 1: Process (deduplicate)
-        sample_news_df["publishedAt"] = pd.to_datetime(
-            sample_news_df["dateTime"], errors="coerce"
-        )
-        processed = processed_news(mock_dagster_context, sample_news_df)
+    def test_full_pipeline_removes_duplicates(self, full_pipeline_result):
+        """Test that the processing step of the full pipeline deduplicates URLs"""
+        processed, _ = full_pipeline_result
 
-        # Should remove 1 duplicate (8 unique URLs out of 10 total)
+        # Should remove 1 duplicate (9 unique URLs out of 10 total)
         assert len(processed) == 9  # 10 - 1 duplicate
 
-        # Step 2: Filter and clean
-        filtered = filtered_news(mock_dagster_context, processed)
+    def test_full_pipeline_keeps_valid_articles(self, full_pipeline_result):
+        """Test that the filtering step of the full pipeline keeps valid articles"""
+        _, filtered = full_pipeline_result
 
         # Should keep only valid articles:
         # - 3 valid articles
@@ -223,43 +334,18 @@ class TestIntegrationScenarios:
         # - Remove: 1 no title, 1 no body, 1 [Removed], 1 invalid date, 1 duplicate (already removed)
         assert len(filtered) >= 4  # At least the valid articles
 
-        # All results should have required fields
-        assert filtered["title"].notna().all()
-        assert filtered["body"].notna().all()
-        assert filtered["publishedAt"].notna().all()
+    def test_full_pipeline_results_have_required_fields(self, full_pipeline_result):
+        """Test that every article out of the full pipeline has its required fields"""
+        _, filtered = full_pipeline_result
 
-    def test_pipeline_handles_all_invalid_data(self, mock_dagster_context):
-        """Test that pipeline handles datasets with only invalid articles"""
-        # Create DataFrame with only invalid articles
-        invalid_data = pd.DataFrame(
-            [
-                {
-                    "title": "",
-                    "url": "http://example.com/1",
-                    "body": "Content",
-                    "dateTime": "2024-12-15",
-                },
-                {
-                    "title": "Title",
-                    "url": "http://example.com/2",
-                    "body": "",
-                    "dateTime": "2024-12-15",
-                },
-                {
-                    "title": "[Removed]",
-                    "url": "http://example.com/3",
-                    "body": "[Removed]",
-                    "dateTime": "2024-12-15",
-                },
-            ]
-        )
-
-        invalid_data["publishedAt"] = pd.to_datetime(
-            invalid_data["dateTime"], errors="coerce"
-        )
+        assert_valid_filtered_df(filtered)
 
+    def test_pipeline_handles_all_invalid_data(
+        self, mock_dagster_context, all_invalid_df
+    ):
+        """Test that pipeline handles datasets with only invalid articles"""
         # Process
-        processed = processed_news(mock_dagster_context, invalid_data)
+        processed = processed_news(mock_dagster_context, all_invalid_df)
         assert len(processed) == 3  # No duplicates to remove
 
         # Filter
@@ -0,0 +1,112 @@
+"""
+Unit tests for the pipeline failure sensors.
+
+Tests cover the failed-run cache shared by both sensors.
+"""
+
+import pytest
+from datetime import datetime
+from unittest.mock import Mock
+from freezegun import freeze_time
+import dagster as dg
+from dagster import DagsterInstance, DagsterRunStatus
+
+from newsapi_dentsu.defs.sensors import (
+    FAILED_RUNS_LIMIT,
+    asset_failure_sensor,
+    fetch_failed_runs,
+    pipeline_failure_sensor,
+)
+
+
+@pytest.fixture
+def failing_instance(monkeypatch):
+    """
+    Create an ephemeral Dagster instance holding two failed runs.
+
+    get_run_records is wrapped in a Mock so tests can count storage queries.
+
+    Returns:
+        DagsterInstance: In-memory instance with failed runs
+    """
+    instance = DagsterInstance.ephemeral()
+    for job_name in ["news_job", "other_job"]:
+        instance.add_run(
+            dg.DagsterRun(job_name=job_name, status=DagsterRunStatus.FAILURE)
+        )
+    monkeypatch.setattr(
+        instance, "get_run_records", Mock(wraps=instance.get_run_records)
+    )
+    yield instance
+    instance.dispose()
+
+
+class TestFetchFailedRuns:
+    """Tests for the fetch_failed_runs cache shared by both sensors"""
+
+    # Each test uses its own window so the module-level cache never carries a
+    # result from one test into another
+
+    def test_same_window_hits_cache(self, failing_instance):
+        """Test that a second query in the same minute reuses the first result"""
+        first = fetch_failed_runs(failing_instance, datetime(2024, 1, 1, 9, 0, 5))
+        second = fetch_failed_runs(failing_instance, datetime(2024, 1, 1, 9, 0, 40))
+
+        assert len(first) == 2
+        assert second is first
+        assert failing_instance.get_run_records.call_count == 1
+
+    def test_different_limit_misses_cache(self, failing_instance):
+        """Test that the limit is part of the cache key"""
+        since = datetime(2024, 1, 1, 10, 0)
+        fetch_failed_runs(failing_instance, since)
+        limited = fetch_failed_runs(failing_instance, since, limit=1)
+
+        assert len(limited) == 1
+        assert failing_instance.get_run_records.call_count == 2
+
+    def test_new_window_clears_cache(self, failing_instance):
+        """Test that moving to the next minute drops the previous window"""
+        fetch_failed_runs(failing_instance, datetime(2024, 1, 1, 11, 0))
+        fetch_failed_runs(failing_instance, datetime(2024, 1, 1, 11, 1))
+        # The first window was evicted, so asking for it queries again
+        fetch_failed_runs(failing_instance, datetime(2024, 1, 1, 11, 0))
+
+        assert failing_instance.get_run_records.call_count == 3
+
+
+class TestFailureSensors:
+    """Tests for the hourly failure sensors"""
+
+    @freeze_time("2024-02-01 12:00:00")
+    def test_sensors_share_one_query(self, failing_instance):
+        """Test that both sensors evaluated in the same window query runs once"""
+        pipeline_failure_sensor(dg.build_sensor_context(instance=failing_instance))
+        asset_failure_sensor(dg.build_sensor_context(instance=failing_instance))
+
+        assert failing_instance.get_run_records.call_count == 1
+
+    @freeze_time("2024-03-01 12:00:00")
+    def test_sensor_updates_cursor(self, failing_instance):
+        """Test that the failure sensor moves its cursor to the evaluation time"""
+        context = dg.build_sensor_context(instance=failing_instance)
+        pipeline_failure_sensor(context)
+
+        assert context.cursor == "2024-03-01T12:00:00"
+
+    @freeze_time("2024-04-01 12:00:00")
+    def test_alert_flags_truncated_failure_count(self, failing_instance, monkeypatch):
+        """Test that a capped failure list is reported as a lower bound"""
+        for _ in range(FAILED_RUNS_LIMIT):
+            failing_instance.add_run(
+                dg.DagsterRun(job_name="news_job", status=DagsterRunStatus.FAILURE)
+            )
+        notify = Mock()
+        monkeypatch.setattr(
+            "newsapi_dentsu.defs.sensors.send_failure_notification", notify
+        )
+
+        pipeline_failure_sensor(dg.build_sensor_context(instance=failing_instance))
+
+        assert len(notify.call_args.kwargs["failures"]) == FAILED_RUNS_LIMIT
+        assert notify.call_args.kwargs["truncated"] is True